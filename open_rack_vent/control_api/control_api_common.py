@@ -1,6 +1,8 @@
 """Common code shared between the different external control APIs"""
 
-from typing import Callable, NamedTuple
+from typing import Callable, List, NamedTuple, Optional
+
+from open_rack_vent.host_hardware.board_interface_types import TemperatureReader
 
 
 class APIController(NamedTuple):
@@ -10,3 +12,23 @@ class APIController(NamedTuple):
 
     non_blocking_run: Callable[[], None]
     stop: Callable[[], None]
+
+
+def average_temperature(readers: List[TemperatureReader]) -> Optional[float]:
+    """
+    Read each of the sensors and average the valid readings. Done in a single pass with plain float
+    arithmetic, without building any intermediate lists.
+    :param readers: To read.
+    :return: The average temperature in Celsius, `None` if none of the sensors could be read.
+    """
+
+    total = 0.0
+    count = 0
+
+    for read_fn in readers:
+        temperature = read_fn()
+        if temperature is not None:
+            total += temperature
+            count += 1
+
+    return total / count if count else None
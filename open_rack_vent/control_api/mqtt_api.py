@@ -2,21 +2,23 @@
 Models the ORV in MQTT so it can be controlled via Home Assistant (or other MQTT interfaces).
 """
 
-import itertools
-import json
 import logging
-import statistics
 import threading
-import time
-from typing import Callable, Dict, Union
+from typing import Callable, Dict, List, NamedTuple, Tuple, Union
 
 import paho.mqtt.client as mqtt
+from pydantic import BaseModel, ConfigDict
+from pydantic_core import to_json
 
 from open_rack_vent import canonical_stop_event
 from open_rack_vent.canonical_stop_event import SignalEvent
-from open_rack_vent.control_api.control_api_common import APIController
+from open_rack_vent.control_api.control_api_common import APIController, average_temperature
 from open_rack_vent.host_hardware import OpenRackVentHardwareInterface
-from open_rack_vent.host_hardware.board_interface_types import PCBRevision, RackLocation
+from open_rack_vent.host_hardware.board_interface_types import (
+    RACK_LOCATION_BY_VALUE,
+    PCBRevision,
+    TemperatureReader,
+)
 
 LOGGER = logging.getLogger(__name__)
 
@@ -31,18 +33,144 @@ def _model_from_pcb_revision(pcb_revision: PCBRevision) -> str:
     return f"ORV: {pcb_revision.value}"
 
 
+class DiscoveryDevice(BaseModel):
+    """
+    Home Assistant device metadata, shared by all the discovery configs for this ORV.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    identifiers: List[str]
+    manufacturer: str
+    model: str
+    name: str
+
+
+class TemperatureDiscovery(BaseModel):
+    """
+    Home Assistant discovery config for the temperature sensor at a rack location.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    state_topic: str
+    unique_id: str
+    device_class: str = "temperature"
+    unit_of_measurement: str = "°C"
+    device: DiscoveryDevice
+    availability_topic: str
+    force_update: bool = True
+
+
+class FanDiscovery(BaseModel):
+    """
+    Home Assistant discovery config for the fan power control at a rack location.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    state_topic: str
+    command_topic: str
+    unique_id: str
+    min: int = 0
+    max: int = 1
+    step: float = 0.01
+    device: DiscoveryDevice
+    availability_topic: str
+    value_template: str = "{{ value_json.power }}"
+
+
+class DiscoveryMessage(NamedTuple):
+    """
+    A retained Home Assistant autodiscovery config message.
+    """
+
+    topic: str
+    payload: bytes
+
+
+def create_discovery_messages(
+    device_id: str,
+    orv_hardware_interface: OpenRackVentHardwareInterface,
+    pcb_revision: PCBRevision,
+) -> List[DiscoveryMessage]:
+    """
+    Build the Home Assistant autodiscovery messages for all control surfaces. None of the inputs
+    change while the application is running, so this is done once up front and the serialized
+    payloads are re-sent as-is on every (re)connection.
+
+    :param device_id: The MQTT device ID / topic prefix for this device.
+    :param orv_hardware_interface: Interface providing access to fans and temperature sensors.
+    :param pcb_revision: Hardware revision used to generate the MQTT device model.
+    :return: The messages to publish, in order.
+    """
+
+    device = DiscoveryDevice(
+        identifiers=[f"open_rack_vent_{device_id}"],
+        manufacturer="OpenRackVent",
+        model=_model_from_pcb_revision(pcb_revision=pcb_revision),
+        name="Open Rack Vent",
+    )
+
+    availability_topic = f"{device_id}/status/online"
+
+    messages: List[DiscoveryMessage] = []
+
+    # Temperature sensors
+    for temperature_rack_location in orv_hardware_interface.temperature_readers.keys():
+        unique_id = f"{temperature_rack_location.value}_temperature"
+
+        messages.append(
+            DiscoveryMessage(
+                topic=f"homeassistant/sensor/{unique_id}/config",
+                payload=TemperatureDiscovery(
+                    name=f"ORV Temperature {temperature_rack_location.value}",
+                    state_topic=f"{device_id}/temperature/{temperature_rack_location.value}",
+                    unique_id=unique_id,
+                    device=device,
+                    availability_topic=availability_topic,
+                )
+                .model_dump_json()
+                .encode("utf-8"),
+            )
+        )
+
+    # Fan controls
+    for fan_rack_location in orv_hardware_interface.fan_controllers.keys():
+        unique_id = f"{fan_rack_location.value}_fan"
+
+        messages.append(
+            DiscoveryMessage(
+                topic=f"homeassistant/number/{unique_id}/config",
+                payload=FanDiscovery(
+                    name=f"ORV Fan Power {fan_rack_location.value}",
+                    state_topic=f"{device_id}/fan/{fan_rack_location.value}/state",
+                    command_topic=f"{device_id}/fan/{fan_rack_location.value}/set",
+                    unique_id=unique_id,
+                    device=device,
+                    availability_topic=availability_topic,
+                )
+                .model_dump_json()
+                .encode("utf-8"),
+            )
+        )
+
+    return messages
+
+
 def make_on_connect(
     device_id: str,
-    orv_hardware_interface: "OpenRackVentHardwareInterface",
-    pcb_revision: "PCBRevision",
+    discovery_messages: List[DiscoveryMessage],
 ) -> Callable[[mqtt.Client, None, Dict[str, bool], int], None]:
     """
     Create a stateless MQTT `on_connect` callback that publishes Home Assistant
     autodiscovery messages for all control surfaces.
 
     :param device_id: The MQTT device ID / topic prefix for this device.
-    :param orv_hardware_interface: Interface providing access to fans and temperature sensors.
-    :param pcb_revision: Hardware revision used to generate the MQTT device model.
+    :param discovery_messages: Pre-serialized autodiscovery messages, see
+    `create_discovery_messages`.
     :return: Callable suitable for `mqtt.Client.on_connect`.
     """
 
@@ -65,64 +193,8 @@ def make_on_connect(
         client.subscribe(f"{device_id}/fan/+/set")
 
         try:
-            # Device metadata for HA discovery
-            device = {
-                "identifiers": [f"open_rack_vent_{device_id}"],
-                "manufacturer": "OpenRackVent",
-                "model": _model_from_pcb_revision(pcb_revision=pcb_revision),
-                "name": "Open Rack Vent",
-            }
-
-            availability_topic = f"{device_id}/status/online"
-
-            # Publish temperature sensors
-            for temperature_rack_location in orv_hardware_interface.temperature_readers.keys():
-                unique_id = f"{temperature_rack_location.value}_temperature"
-                topic = f"homeassistant/sensor/{unique_id}/config"
-
-                client.publish(
-                    topic,
-                    json.dumps(
-                        {
-                            "name": f"ORV Temperature {temperature_rack_location.value}",
-                            "state_topic": (
-                                f"{device_id}/temperature/{temperature_rack_location.value}"
-                            ),
-                            "unique_id": unique_id,
-                            "device_class": "temperature",
-                            "unit_of_measurement": "°C",
-                            "device": device,
-                            "availability_topic": availability_topic,
-                            "force_update": True,
-                        }
-                    ),
-                    retain=True,
-                )
-
-            # Publish fan controls
-            for fan_rack_location in orv_hardware_interface.fan_controllers.keys():
-                unique_id = f"{fan_rack_location.value}_fan"
-                topic = f"homeassistant/number/{unique_id}/config"
-
-                client.publish(
-                    topic,
-                    json.dumps(
-                        {
-                            "name": f"ORV Fan Power {fan_rack_location.value}",
-                            "state_topic": f"{device_id}/fan/{fan_rack_location.value}/state",
-                            "command_topic": f"{device_id}/fan/{fan_rack_location.value}/set",
-                            "unique_id": unique_id,
-                            "min": 0,
-                            "max": 1,
-                            "step": 0.01,
-                            "device": device,
-                            "availability_topic": availability_topic,
-                            "value_template": "{{ value_json.power }}",
-                        }
-                    ),
-                    retain=True,
-                )
-
+            for discovery_message in discovery_messages:
+                client.publish(discovery_message.topic, discovery_message.payload, retain=True)
         except Exception as e:  # pylint: disable=broad-except
             LOGGER.error(f"Failed to publish discovery: {e}")
 
@@ -147,6 +219,11 @@ def make_on_message(
     :return: Callable suitable for `mqtt.Client.on_message`.
     """
 
+    # Expect: <device_id>/fan/<rack_location>/set
+    set_topic_prefix = f"{device_id}/fan/"
+    set_topic_suffix = "/set"
+    min_set_topic_length = len(set_topic_prefix) + len(set_topic_suffix)
+
     def on_message(client: mqtt.Client, _userdata: None, msg: mqtt.MQTTMessage) -> None:
         """
         Handle incoming MQTT messages for fan control.
@@ -156,17 +233,23 @@ def make_on_message(
         :param msg: MQTT message containing topic and payload.
         """
         try:
-            topic_parts = msg.topic.split("/")
+            topic = msg.topic
 
-            # Expect: <device_id>/fan/<rack_location>/set
-            if len(topic_parts) != 4 or topic_parts[1] != "fan" or topic_parts[3] != "set":
+            if (
+                len(topic) <= min_set_topic_length
+                or not topic.startswith(set_topic_prefix)
+                or not topic.endswith(set_topic_suffix)
+            ):
                 return None  # Not a fan set command, ignore
 
-            _, _, rack_location_raw, _ = topic_parts
+            rack_location_raw = topic[len(set_topic_prefix) : -len(set_topic_suffix)]
 
-            rack_location = RackLocation(rack_location_raw)
+            rack_location = RACK_LOCATION_BY_VALUE.get(rack_location_raw)
+            if rack_location is None:
+                LOGGER.warning(f"Unknown rack_location={rack_location_raw} in topic {topic}")
+                return None
 
-            power = float(msg.payload.decode())
+            power = float(msg.payload)
 
             # Lookup fan controllers by rack location
             controls = orv_hardware_interface.fan_controllers.get(rack_location)
@@ -175,12 +258,13 @@ def make_on_message(
                 return None
 
             # Execute all fan controls
-            _commands = list(itertools.chain.from_iterable(fn(power) for fn in controls))
+            for fan_control in controls:
+                fan_control(power)
 
             # Publish new state to MQTT
             client.publish(
-                f"{device_id}/fan/{rack_location}/state",
-                json.dumps({"power": power}),
+                f"{device_id}/fan/{rack_location.value}/state",
+                to_json({"power": power}),
                 retain=True,
             )
         except Exception as e:  # pylint: disable=broad-except
@@ -215,6 +299,12 @@ def run_open_rack_vent_mqtt(  # pylint: disable=too-many-positional-arguments
     :param mqtt_password: Used to authenticate with MQTT.
     """
 
+    discovery_messages = create_discovery_messages(
+        device_id=device_id,
+        orv_hardware_interface=orv_hardware_interface,
+        pcb_revision=pcb_revision,
+    )
+
     def thread_target(stop_event: SignalEvent) -> None:
         """
         Creates the MQTT client and starts publishing/handling events.
@@ -227,9 +317,8 @@ def run_open_rack_vent_mqtt(  # pylint: disable=too-many-positional-arguments
         mqtt_client.will_set(f"{device_id}/status/online", "offline", retain=True)
 
         mqtt_client.on_connect = make_on_connect(
-            orv_hardware_interface=orv_hardware_interface,
             device_id=device_id,
-            pcb_revision=pcb_revision,
+            discovery_messages=discovery_messages,
         )
 
         mqtt_client.on_message = make_on_message(orv_hardware_interface, device_id)
@@ -237,27 +326,36 @@ def run_open_rack_vent_mqtt(  # pylint: disable=too-many-positional-arguments
         mqtt_client.connect(broker_host, broker_port, 60)
         mqtt_client.loop_start()
 
+        topics_readers: List[Tuple[str, List[TemperatureReader]]] = [
+            (f"{device_id}/temperature/{location.value}", readers)
+            for location, readers in orv_hardware_interface.temperature_readers.items()
+        ]
+
         try:
             while not stop_event.is_set():
                 try:
-                    for location, readers in orv_hardware_interface.temperature_readers.items():
+                    # All the sensors are read before anything is published so the messages are
+                    # queued back-to-back and paho's network thread can flush them together.
+                    messages: List[Tuple[str, Union[str, float]]] = []
 
-                        topic = f"{device_id}/temperature/{location.value}"
+                    for topic, readers in topics_readers:
 
-                        temperatures = list(filter(None, [read_fn() for read_fn in readers]))
+                        temperature = average_temperature(readers)
 
-                        if temperatures:
-                            payload: Union[str, float] = statistics.mean(temperatures)
-                        else:
-                            payload = "unavailable"
+                        messages.append(
+                            (topic, temperature if temperature is not None else "unavailable")
+                        )
 
+                    for topic, payload in messages:
                         mqtt_client.publish(topic, payload, retain=True)
 
-                        LOGGER.info(f"Published payload: [{payload}] to topic: [{topic}]")
+                    LOGGER.info(f"Published temperatures: {messages}")
 
                 except Exception as e:  # pylint: disable=broad-except
                     logging.error(f"Failed to publish temperatures: {e}")
-                time.sleep(publish_interval)
+
+                # Sleeps until the next tick, but wakes up immediately if asked to stop.
+                stop_event.wait(publish_interval)
 
         except KeyboardInterrupt:
             LOGGER.info("Shutting down MQTT interface...")
@@ -3,15 +3,15 @@ Uses fastAPI to create a web interface that can set the state of the fans and re
 sensors.
 """
 
+import asyncio
 import itertools
-import statistics
 import threading
 from typing import Dict, List
 
 import fastapi
 import uvicorn
 
-from open_rack_vent.control_api.control_api_common import APIController
+from open_rack_vent.control_api.control_api_common import APIController, average_temperature
 from open_rack_vent.host_hardware import OnboardLED, OpenRackVentHardwareInterface
 from open_rack_vent.host_hardware.board_interface_types import RackLocation
 
@@ -26,80 +26,104 @@ def create_web_api(
 
     app = fastapi.FastAPI()
 
+    # Looked up once here rather than off of the interface on every request.
+    fan_controllers = orv_hardware_interface.fan_controllers
+    temperature_readers = orv_hardware_interface.temperature_readers
+    set_onboard_led = orv_hardware_interface.set_onboard_led
+
     @app.get("/")
-    def read_root() -> Dict[str, str]:
+    async def read_root() -> Dict[str, str]:
         """
-        Proves the server is working.
+        Proves the server is working. There's no I/O, so this runs right on the event loop rather
+        than being handed to the threadpool like a plain `def` route would be.
         :return: Response dict.
         """
         return {"Hello": "World"}
 
     @app.post("/fan/{location}/{power}", description="Sets the power of different fans.")
-    def change_fan_power(
+    async def change_fan_power(
         location: RackLocation = fastapi.Path(description="The location in the rack to affect."),
         power: float = fastapi.Path(ge=0, le=1.0, description="Power level to set"),
     ) -> Dict[str, List[str]]:
         """
         Set the power of a given fan module based on rack level and side.
+        The sysfs writes are blocking, so they're run in a worker thread to keep the event loop
+        free to serve other requests.
         :param location: See FastAPI docs.
         :param power: See FastAPI docs.
         :return: The commands executed to set the fan state. This is debugging information and
         can be ignored.
         """
 
-        controls = orv_hardware_interface.fan_controllers.get(location)
+        controls = fan_controllers.get(location)
 
         if controls is None:
             raise ValueError(f"Invalid Rack Location: {location}")
 
-        return {
-            "commands": list(
-                itertools.chain.from_iterable([fan_control(power) for fan_control in controls])
+        def apply_power() -> List[str]:
+            """
+            Drive each of the fans at the location.
+            :return: The commands executed.
+            """
+            return list(
+                itertools.chain.from_iterable(fan_control(power) for fan_control in controls)
             )
-        }
+
+        return {"commands": await asyncio.to_thread(apply_power)}
 
     @app.get(
         "/temperature/{location}",
         description="Get the average temperature of the thermistors near the specified location.",
     )
-    def read_average_temperature(
+    async def read_average_temperature(
         location: RackLocation = fastapi.Path(description="The location in the rack to read from"),
     ) -> Dict[str, float]:
         """
         Get the average temperature of all thermistors on a given rack side.
+        Like `change_fan_power`, the blocking ADC reads are run in a worker thread.
 
         :param location: Location within the rack to read the temperature from.
         :return: Dictionary with the average temperature, e.g. {"temperature": 32.5}.
+        :raises HTTPException: 503 if none of the thermistors at the location could be read.
         """
 
-        read_temperatures = orv_hardware_interface.temperature_readers.get(location)
+        read_temperatures = temperature_readers.get(location)
 
         if read_temperatures is None:
             raise ValueError(f"Invalid Rack Location: {location}")
 
-        return {
-            "temperature": statistics.mean([read_function() for read_function in read_temperatures])
-        }
+        temperature = await asyncio.to_thread(average_temperature, read_temperatures)
+
+        if temperature is None:
+            raise fastapi.HTTPException(
+                status_code=503, detail=f"Couldn't read any thermistors at: {location.value}"
+            )
+
+        return {"temperature": temperature}
 
     @app.post(
         "/setLED/{led}/{state}",
         description="Override the state of one of the onboard LEDs",
     )
-    def set_led(
+    async def set_led(
         led: OnboardLED = fastapi.Path(description="The LED to modify"),
         state: bool = fastapi.Path(description="The state to set the LED to."),
     ) -> Dict[str, List[str]]:
         """
         Override the LED state of the different status LEDs.
+        Like `change_fan_power`, the blocking sysfs writes are run in a worker thread.
 
         :param led: The board marking of the LED to modify.
         :param state: The on/off state of the LED. True to turn it on... please...
         :return: A dict containing the commands executed to set the LED. For debugging.
         """
 
-        return {"commands": orv_hardware_interface.set_onboard_led(led, state)}
+        return {"commands": await asyncio.to_thread(set_onboard_led, led, state)}
 
-    config = uvicorn.Config(app, host=host, port=port, log_level="info")
+    # Access logging formats and writes a line for every request, which adds up quickly when the
+    # temperature endpoints are being polled. uvloop/httptools are picked up automatically if
+    # they're installed, see README.
+    config = uvicorn.Config(app, host=host, port=port, log_level="info", access_log=False)
     server = uvicorn.Server(config)
 
     server_thread = threading.Thread(target=server.run)
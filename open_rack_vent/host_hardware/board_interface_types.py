@@ -29,6 +29,15 @@ class RackLocation(str, Enum):
     exhaust_upper = "exhaust_upper"
 
 
+RACK_LOCATION_BY_VALUE: Dict[str, RackLocation] = {
+    rack_location.value: rack_location for rack_location in RackLocation
+}
+"""
+For converting raw strings (MQTT topics etc.) to `RackLocation`s on hot paths. A dict lookup is much
+cheaper than `RackLocation(value)`, and a miss is a `None` rather than an exception.
+"""
+
+
 class HardwarePlatform(str, Enum):
     """
     Different supported hardware backends that can drive the Open Rack Vent PCBs.
@@ -104,6 +113,9 @@ class OpenRackVentHardwareInterface(NamedTuple):
     fan_controllers: Dict[RackLocation, List[FanController]]
     temperature_readers: Dict[RackLocation, List[TemperatureReader]]
 
+    # Releases any resources (open files etc.) held by the interface. Call on shutdown.
+    close: Callable[[], None]
+
 
 if __name__ == "__main__":
 
@@ -3,11 +3,12 @@ Implements the `OpenRackVentHardwareInterface` for a BeagleBone Black driving an
 version v1.0.0. This is a bit gritty, it's nice to be able to keep the definition modules cleaner.
 """
 
+import os
 import subprocess
+import threading
 from enum import Enum
-from functools import partial
-from pathlib import Path
-from typing import Dict, List, NamedTuple
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Set
 
 from open_rack_vent import thermistor
 from open_rack_vent.host_hardware import board_markings
@@ -19,29 +20,111 @@ from open_rack_vent.host_hardware.board_interface_types import (
 )
 
 
-def echo_value(path: Path, value: str) -> str:
+def echo_value(path: str, value: str) -> str:
     """
-    Open the path and write the value to it. Return a summary of what happened as a string
+    Open the path and write the value to it. Return a summary of what happened as a string.
+    Sysfs paths are already canonical, so the path isn't resolved before opening.
     :param path: Path to write to.
     :param value: String to write.
     :return: Summary of what happened as a string, for printing etc.
     """
 
-    with open(str(path.resolve()), "w", encoding="utf-8") as file:
+    with open(path, "w", encoding="utf-8") as file:
         file.write(value)
 
     return f"echo {path} > {value}"
 
 
-def cat_value(path: Path) -> str:
+_FD_CACHE: Dict[str, int] = {}
+"""
+File descriptors for the sysfs files that are hit on every control tick/request, keyed by path.
+These are opened on first use and held open until `close_cached_fds` is called. Files that are
+only written once during setup still go through `echo_value`.
+"""
+
+_SYSFS_LOCK = threading.RLock()
+"""
+The fan setters and LEDs are driven from several threads at once (the web API's worker threads,
+the MQTT network thread, the LED scheduler). This serializes every use of the cached files (opening,
+each read, each check/write/record sequence against the module level state, closing), so the
+recorded state always matches what's actually in the hardware and no fd is closed while it's in
+use. Re-entrant because the setup functions open cached files too.
+"""
+
+
+def _cached_fd(path: str, flags: int) -> int:
     """
-    Read the contents of a file, like the `cat` command.
-    :param path: Path to read.
-    :return: The contents of the file as a string.
+    Get the cached file descriptor for a sysfs file, opening it if this is the first use.
+    :param path: Path to the file.
+    :param flags: `os.open` flags, only used if the file needs to be opened.
+    :return: The file descriptor.
     """
 
-    with open(str(path.resolve()), "r", encoding="utf-8") as file:
-        return file.read()
+    with _SYSFS_LOCK:
+        fd = _FD_CACHE.get(path)
+
+        if fd is None:
+            fd = os.open(path, flags)
+            _FD_CACHE[path] = fd
+
+        return fd
+
+
+def _echo_bytes(fd: int, value: bytes) -> None:
+    """
+    Hot path version of `echo_value`. Writes already encoded bytes to the start of an already open
+    file, there's no open/close, encoding or summary formatting.
+    :param fd: File descriptor to write to, see `_cached_fd`.
+    :param value: Bytes to write.
+    :return: None
+    """
+
+    os.pwrite(fd, value, 0)
+
+
+def close_cached_fds() -> None:
+    """
+    Close all the cached sysfs file descriptors. Anything that's used again afterward is reopened.
+    :return: None
+    """
+
+    with _SYSFS_LOCK:
+        while _FD_CACHE:
+            _, fd = _FD_CACHE.popitem()
+            os.close(fd)
+
+
+def set_pin_mode(pin_name: str, pinmux_path: str, mode: str) -> str:
+    """
+    Set the mode (`pwm`, `gpio` etc.) of a header pin. This writes the pin's sysfs pinmux state
+    directly, which is what `config-pin` does under the hood. Images that don't expose the pinmux
+    helper in sysfs fall back to shelling out to `config-pin`.
+    :param pin_name: Header pin, like `P9_16`.
+    :param pinmux_path: The pin's sysfs pinmux state file.
+    :param mode: Mode to put the pin in.
+    :return: Summary of what happened as a string, for printing etc.
+    :raises OSError: If the pin couldn't be muxed, including `config-pin` failing.
+    """
+
+    if os.path.exists(pinmux_path):
+        return echo_value(path=pinmux_path, value=mode)
+
+    command = f"config-pin {pin_name} {mode}"
+
+    try:
+        # Output isn't used, so it isn't piped back. stderr is inherited so failures still show up
+        # in the logs.
+        _ = subprocess.run(
+            command,
+            shell=True,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+    except subprocess.CalledProcessError as e:
+        # Surfaced the same way as a failed sysfs write.
+        raise OSError(f"`{command}` failed with exit code {e.returncode}") from e
+
+    return command
 
 
 class PWMPin(str, Enum):
@@ -85,46 +168,203 @@ Wish I had a better source for this table than this blog post...
 """
 
 
-def configure_pwm_pin(pwm_pin: PWMPin, period_ns: int, duty_pct: float) -> List[str]:
+class PWMSysfsPaths(NamedTuple):
+    """
+    The sysfs attribute files that control a single PWM channel, and the pinmux state file of the
+    pin it's routed to.
+    """
+
+    pinmux: str
+    period: str
+    duty_cycle: str
+    enable: str
+
+
+_PWM_SYSFS_PATHS: Dict[PWMPin, PWMSysfsPaths] = {
+    pwm_pin: PWMSysfsPaths(
+        pinmux=f"/sys/devices/platform/ocp/ocp:{pwm_pin.value}_pinmux/state",
+        period=f"/dev/bone/pwm/{pwm_channel.pwm_id}/{pwm_channel.channel}/period",
+        duty_cycle=f"/dev/bone/pwm/{pwm_channel.pwm_id}/{pwm_channel.channel}/duty_cycle",
+        enable=f"/dev/bone/pwm/{pwm_channel.pwm_id}/{pwm_channel.channel}/enable",
+    )
+    for pwm_pin, pwm_channel in _PWM_CHANNEL_LOOKUP.items()
+}
+"""
+Built once at import so the paths aren't re-formatted every time a fan's power is changed.
+"""
+
+
+_CONFIGURED_PWM_PINS: Set[PWMPin] = set()
+"""
+Pins that have already been muxed to PWM mode. The mode only needs to be set once per process.
+"""
+
+_PWM_PERIODS: Dict[PWMPin, int] = {}
+"""
+The period last written to each configured pin, in nanoseconds. The period only needs to be
+re-written if a caller asks for a different one.
+"""
+
+_PWM_LAST_DUTY: Dict[PWMPin, int] = {}
+"""
+The last duty cycle, in nanoseconds, successfully written to each pin. A request for the same duty
+cycle returns before any lookups or writes.
+"""
+
+
+@lru_cache(maxsize=256)
+def _duty_cycle_payload(duty_ns: int) -> bytes:
+    """
+    The sysfs `duty_cycle` payload for a duty cycle, so setting a fan's power doesn't have to
+    stringify and encode it every time. Filled in lazily and bounded, a fan only ever sits at a
+    handful of powers, and a long period shouldn't mean a huge table.
+    :param duty_ns: Duty cycle in nanoseconds.
+    :return: `str(duty_ns).encode()`.
+    """
+
+    return str(duty_ns).encode("ascii")
+
+
+@lru_cache(maxsize=256)
+def _duty_cycle_command(duty_cycle_path: str, duty_ns: int) -> str:
+    """
+    Companion to `_duty_cycle_payload`, the echo summary of writing a duty cycle to a given
+    `duty_cycle` file, so it doesn't need to be formatted on every write.
+    :param duty_cycle_path: Path to the `duty_cycle` file.
+    :param duty_ns: Duty cycle in nanoseconds.
+    :return: The summary.
     """
-    Set the period (...frequency) of a pwm output channel.
+
+    return f"echo {duty_cycle_path} > {duty_ns}"
+
+
+def setup_pwm_pin(pwm_pin: PWMPin, period_ns: int, duty_ns: int) -> List[str]:
+    """
+    One-time setup of a pwm output channel.
 
     In order...
 
-        * The `config-pin` utility is used to make sure the pin is set to PWM mode.
+        * The pinmux is set to PWM mode, see `set_pin_mode`.
         * period is set.
-        * duty cycle is set.
+        * duty_cycle is set, before the output is on, so it never runs with a stale duty cycle.
         * pwm is enabled.
 
-    :param pwm_pin: To modify.
+    The `duty_cycle` file is also opened and held open for `create_pwm_duty_setter`.
+
+    :param pwm_pin: To set up.
     :param period_ns: Period of the pwm square wave in nanoseconds.
-    :param duty_pct: Duty cycle of the PWM signal as a float from 0 to 1.
+    :param duty_ns: Initial duty cycle in nanoseconds.
     :return: The echo write strings for printing/logging etc.
     """
 
-    pwm_channel = _PWM_CHANNEL_LOOKUP[pwm_pin]
+    sysfs_paths = _PWM_SYSFS_PATHS[pwm_pin]
 
-    _ = subprocess.run(
-        f"config-pin {pwm_pin.value} pwm", shell=True, check=True, capture_output=True
-    )
-
-    device_tree_base_path = Path(f"/dev/bone/pwm/{pwm_channel.pwm_id}/{pwm_channel.channel}")
-
-    return [
-        echo_value(
-            path=device_tree_base_path.joinpath("period"),
-            value=str(period_ns),
+    commands = [
+        set_pin_mode(
+            pin_name=pwm_pin.value,
+            pinmux_path=sysfs_paths.pinmux,
+            mode="pwm",
         ),
         echo_value(
-            path=device_tree_base_path.joinpath("duty_cycle"),
-            value=str(int(period_ns * duty_pct)),
+            path=sysfs_paths.period,
+            value=str(period_ns),
         ),
+    ]
+
+    _echo_bytes(_cached_fd(sysfs_paths.duty_cycle, os.O_WRONLY), _duty_cycle_payload(duty_ns))
+    commands.append(_duty_cycle_command(sysfs_paths.duty_cycle, duty_ns))
+
+    commands.append(
         echo_value(
-            path=device_tree_base_path.joinpath("enable"),
+            path=sysfs_paths.enable,
             value=str(1),
+        )
+    )
+
+    _CONFIGURED_PWM_PINS.add(pwm_pin)
+    _PWM_PERIODS[pwm_pin] = period_ns
+    _PWM_LAST_DUTY[pwm_pin] = duty_ns
+
+    return commands
+
+
+def _change_pwm_period(pwm_pin: PWMPin, period_ns: int) -> List[str]:
+    """
+    Change the period of an already set up pwm output channel. The kernel rejects a period that is
+    shorter than the current duty cycle, so the duty cycle is zeroed first.
+    :param pwm_pin: To modify.
+    :param period_ns: New period of the pwm square wave in nanoseconds.
+    :return: The echo write strings for printing/logging etc.
+    """
+
+    sysfs_paths = _PWM_SYSFS_PATHS[pwm_pin]
+
+    _echo_bytes(_cached_fd(sysfs_paths.duty_cycle, os.O_WRONLY), b"0")
+
+    commands = [
+        f"echo {sysfs_paths.duty_cycle} > 0",
+        echo_value(
+            path=sysfs_paths.period,
+            value=str(period_ns),
         ),
     ]
 
+    _PWM_LAST_DUTY[pwm_pin] = 0
+    _PWM_PERIODS[pwm_pin] = period_ns
+
+    return commands
+
+
+def create_pwm_duty_setter(pwm_pin: PWMPin, period_ns: int) -> FanController:
+    """
+    Create a function that sets the duty cycle of a pwm output channel. The pin's `duty_cycle`
+    path is looked up here, once, rather than on every call.
+
+    The pin is set up with `setup_pwm_pin` the first time it's used, after that setting the duty
+    cycle is a single write to the held open `duty_cycle` file, and nothing at all if the duty
+    cycle hasn't changed. The period is only re-written if it differs from the one the pin was last
+    given.
+
+    :param pwm_pin: To modify.
+    :param period_ns: Period of the pwm square wave in nanoseconds.
+    :return: The setter.
+    """
+
+    duty_cycle_path = _PWM_SYSFS_PATHS[pwm_pin].duty_cycle
+
+    def set_pwm_duty(drive_power: float) -> List[str]:
+        """
+        :param drive_power: Duty cycle of the PWM signal as a float from 0 to 1.
+        :return: The echo write strings for printing/logging etc.
+        :raises ValueError: If `drive_power` is outside of 0-1.
+        """
+
+        if not 0 <= drive_power <= 1:
+            raise ValueError(f"Duty cycle must be between 0 and 1, got: {drive_power}")
+
+        duty_ns = int(period_ns * drive_power)
+
+        with _SYSFS_LOCK:
+            if pwm_pin not in _CONFIGURED_PWM_PINS:
+                return setup_pwm_pin(pwm_pin=pwm_pin, period_ns=period_ns, duty_ns=duty_ns)
+
+            if _PWM_PERIODS[pwm_pin] != period_ns:
+                commands = _change_pwm_period(pwm_pin=pwm_pin, period_ns=period_ns)
+            else:
+                commands = []
+
+            if _PWM_LAST_DUTY.get(pwm_pin) == duty_ns:
+                return commands
+
+            _echo_bytes(_cached_fd(duty_cycle_path, os.O_WRONLY), _duty_cycle_payload(duty_ns))
+            _PWM_LAST_DUTY[pwm_pin] = duty_ns
+
+        commands.append(_duty_cycle_command(duty_cycle_path, duty_ns))
+
+        return commands
+
+    return set_pwm_duty
+
 
 class ADCPin(str, Enum):
     """
@@ -151,6 +391,31 @@ _ANALOG_IN_LOOKUP: Dict[ADCPin, int] = {
 }
 
 
+_ADC_SYSFS_PATHS: Dict[ADCPin, str] = {
+    adc_pin: f"/sys/bus/iio/devices/iio:device0/in_voltage{analog_in_number}_raw"
+    for adc_pin, analog_in_number in _ANALOG_IN_LOOKUP.items()
+}
+"""
+Built once at import so the paths aren't re-formatted on every read.
+"""
+
+
+def _read_cached_int(path: str) -> int:
+    """
+    Read an integer (like ADC counts) out of a sysfs file through a cached file descriptor.
+    :param path: Path to read.
+    :return: The value as an int.
+    """
+
+    # Reading from offset 0 triggers a fresh conversion. Held under the lock so the fd can't be
+    # closed (and its number reused) mid-read.
+    with _SYSFS_LOCK:
+        raw = os.pread(_cached_fd(path, os.O_RDONLY), 16, 0)
+
+    # `int` is fine with the trailing newline.
+    return int(raw)
+
+
 def read_adc_counts(adc_pin: ADCPin) -> int:  # pylint: disable=unused-argument
     """
     Read the ADC counts of a given analog input.
@@ -158,11 +423,7 @@ def read_adc_counts(adc_pin: ADCPin) -> int:  # pylint: disable=unused-argument
     :return: ADC counts as an int.
     """
 
-    return int(
-        cat_value(
-            Path(f"/sys/bus/iio/devices/iio:device0/in_voltage{_ANALOG_IN_LOOKUP[adc_pin]}_raw")
-        )
-    )
+    return _read_cached_int(_ADC_SYSFS_PATHS[adc_pin])
 
 
 class GPIOPin(str, Enum):
@@ -207,61 +468,120 @@ https://docs.beagleboard.org/boards/beaglebone/black/ch07.html
 """
 
 
-def configure_gpio_pin(gpio_pin: GPIOPin, value: bool) -> List[str]:
+class GPIOSysfsPaths(NamedTuple):
+    """
+    The sysfs entries needed to drive a single GPIO pin as an output.
+    """
+
+    pinmux: str
+    gpio_number: str
+    directory: str
+    direction: str
+    value: str
+
+
+def _gpio_sysfs_paths(gpio_pin: GPIOPin, bank_index: GPIOBankIndex) -> GPIOSysfsPaths:
     """
-    Configure a GPIO pin as output and set its logical value.
+    Work out the sysfs entries for a GPIO pin.
+    :param gpio_pin: The pin.
+    :param bank_index: Bank and index of the pin.
+    :return: The sysfs entries.
+    """
+
+    gpio_number = (bank_index.gpio_bank * 32) + bank_index.gpio_index
+    directory = f"/sys/class/gpio/gpio{gpio_number}"
+
+    return GPIOSysfsPaths(
+        pinmux=f"/sys/devices/platform/ocp/ocp:{gpio_pin.value}_pinmux/state",
+        gpio_number=str(gpio_number),
+        directory=directory,
+        direction=f"{directory}/direction",
+        value=f"{directory}/value",
+    )
+
+
+_GPIO_SYSFS_PATHS: Dict[GPIOPin, GPIOSysfsPaths] = {
+    gpio_pin: _gpio_sysfs_paths(gpio_pin, bank_index)
+    for gpio_pin, bank_index in _GPIO_LOOKUP.items()
+}
+"""
+Built once at import so the gpio number and paths aren't re-computed every time an LED is toggled.
+"""
+
+
+_GPIO_INITIALIZED: Set[GPIOPin] = set()
+"""
+Pins that have already been muxed, exported and set as outputs. That only needs to happen once per
+process.
+"""
+
+
+def setup_gpio_pin(gpio_pin: GPIOPin) -> List[str]:
+    """
+    One-time setup of a GPIO pin as an output.
 
     Steps:
-        * use config-pin to switch the pin to gpio mode
+        * switch the pin to gpio mode, see `set_pin_mode`
         * export the GPIO number if needed
         * set the pin direction to 'out'
-        * write the logical value
 
-    :param gpio_pin: GPIOPin to configure.
-    :param value: True = drive high, False = drive low.
+    The `value` file is also opened and held open for `configure_gpio_pin`.
+
+    :param gpio_pin: GPIOPin to set up.
     :return: list of echo command strings executed (for logging)
     """
 
-    bank_index = _GPIO_LOOKUP[gpio_pin]
-
-    gpio_num = (bank_index.gpio_bank * 32) + bank_index.gpio_index
+    sysfs_paths = _GPIO_SYSFS_PATHS[gpio_pin]
 
     # Put pin into mode "gpio"
-    _ = subprocess.run(
-        f"config-pin {gpio_pin.value} gpio",
-        shell=True,
-        check=True,
-        capture_output=True,
-    )
-
-    cmds = []
+    cmds = [
+        set_pin_mode(
+            pin_name=gpio_pin.value,
+            pinmux_path=sysfs_paths.pinmux,
+            mode="gpio",
+        )
+    ]
 
     # Export (may already exist)
-    gpio_path = Path(f"/sys/class/gpio/gpio{gpio_num}")
-
-    if not gpio_path.exists():
+    if not os.path.exists(sysfs_paths.directory):
         cmds.append(
             echo_value(
-                path=Path("/sys/class/gpio/export"),
-                value=str(gpio_num),
+                path="/sys/class/gpio/export",
+                value=sysfs_paths.gpio_number,
             )
         )
 
     # Set direction
     cmds.append(
         echo_value(
-            path=gpio_path.joinpath("direction"),
+            path=sysfs_paths.direction,
             value="out",
         )
     )
 
-    # Set value
-    cmds.append(
-        echo_value(
-            path=gpio_path.joinpath("value"),
-            value="1" if value else "0",
-        )
-    )
+    _cached_fd(sysfs_paths.value, os.O_WRONLY)
+
+    _GPIO_INITIALIZED.add(gpio_pin)
+
+    return cmds
+
+
+def configure_gpio_pin(gpio_pin: GPIOPin, value: bool) -> List[str]:
+    """
+    Set the logical value of a GPIO output. The pin is set up with `setup_gpio_pin` the first time
+    it's used, after that this is a single write to the held open `value` file.
+    :param gpio_pin: GPIOPin to configure.
+    :param value: True = drive high, False = drive low.
+    :return: list of echo command strings executed (for logging)
+    """
+
+    value_path = _GPIO_SYSFS_PATHS[gpio_pin].value
+
+    with _SYSFS_LOCK:
+        cmds = [] if gpio_pin in _GPIO_INITIALIZED else setup_gpio_pin(gpio_pin)
+        _echo_bytes(_cached_fd(value_path, os.O_WRONLY), b"1" if value else b"0")
+
+    cmds.append(f"echo {value_path} > {'1' if value else '0'}")
 
     return cmds
 
@@ -342,9 +662,10 @@ def create_interface(
             :return: Callable to read temperature.
             """
 
-            return lambda: temperature_converter(
-                read_adc_counts(adc_pin=board_marking_lookup.thermistor[board_marking])
-            )
+            # Resolved once here rather than on every read.
+            adc_path = _ADC_SYSFS_PATHS[board_marking_lookup.thermistor[board_marking]]
+
+            return lambda: temperature_converter(_read_cached_int(adc_path))
 
         return [create_read_temperature(board_marking) for board_marking in input_board_markings]
 
@@ -358,10 +679,20 @@ def create_interface(
         """
 
         return [
-            partial(configure_pwm_pin, board_marking_lookup.pwm[board_marking], 1_000)
+            create_pwm_duty_setter(board_marking_lookup.pwm[board_marking], 1_000)
             for board_marking in input_board_markings
         ]
 
+    def close() -> None:
+        """
+        Release the held open sysfs files. The PWM outputs keep their last state.
+        :return: None
+        """
+
+        with _SYSFS_LOCK:
+            close_cached_fds()
+            _PWM_LAST_DUTY.clear()
+
     return OpenRackVentHardwareInterface(
         set_onboard_led=lambda onboard_led, value: configure_gpio_pin(
             gpio_pin=board_marking_lookup.led[onboard_led], value=value
@@ -374,4 +705,5 @@ def create_interface(
             location: create_read_all_temperatures(input_board_markings=thermistor_board_markings)
             for location, thermistor_board_markings in wire_mapping.thermistors.items()
         },
+        close=close,
     )
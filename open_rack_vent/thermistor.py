@@ -4,9 +4,10 @@ The resistor is attached to 3.3V and a 10K pulldown resistor which is attached t
 See schematic for more details.
 """
 
+import bisect
 import json
 from pathlib import Path
-from typing import Callable, Dict, Optional, Sequence, Union
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
 
 from open_rack_vent import assets
 
@@ -38,12 +39,14 @@ def _closest_to_value(
     """
     Given a value, and a list of values, find the closest value in the list to the input.
     :param value: Value to find in list.
-    :param list_of_values: Candidate output values.
+    :param list_of_values: Candidate output values, must be sorted ascending.
     :return: The value closest to `value` in `list_of_values`.
     """
-    return list_of_values[
-        min(range(len(list_of_values)), key=lambda i: abs(list_of_values[i] - value))
-    ]
+    index = bisect.bisect_left(list_of_values, value)
+    return min(
+        list_of_values[max(index - 1, 0) : index + 1],
+        key=lambda candidate: abs(candidate - value),
+    )
 
 
 def _read_resistance_to_temperature(
@@ -68,22 +71,20 @@ def _read_resistance_to_temperature(
 
 
 def _thermistor_temperature_resistance(
-    resistance: float, resistance_to_temperature: Dict[float, float]
+    resistance: float,
+    resistance_to_temperature: Dict[float, float],
+    sorted_resistances: Sequence[float],
 ) -> float:
     """
     Given a resistance and lookup, convert to temperature.
     :param resistance: Thermistor resistance.
     :param resistance_to_temperature: A dict mapping resistance values to their corresponding
     temperature. Units are ohms and degrees Celsius.
+    :param sorted_resistances: The keys of `resistance_to_temperature`, sorted ascending.
     :return: Temperature in degrees Celsius.
     """
 
-    return resistance_to_temperature[
-        _closest_to_value(
-            resistance,
-            list(resistance_to_temperature.keys()),
-        )
-    ]
+    return resistance_to_temperature[_closest_to_value(resistance, sorted_resistances)]
 
 
 def create_adc_counts_to_temperature_converter(
@@ -105,9 +106,11 @@ def create_adc_counts_to_temperature_converter(
         lookup_json_path=lookup_json_path
     )
 
-    def adc_counts_to_temperature(adc_counts: int) -> Optional[float]:
+    sorted_resistances: Tuple[float, ...] = tuple(sorted(resistance_to_temperature))
+
+    def convert(adc_counts: int) -> Optional[float]:
         """
-        Output function, uses the same loaded in mapping.
+        Does the actual conversion, uses the same loaded in mapping.
         :param adc_counts: ADC counts.
         :return: Temperature in degrees Celsius. If something goes wrong, a `None` is returned.
         """
@@ -121,8 +124,25 @@ def create_adc_counts_to_temperature_converter(
             return _thermistor_temperature_resistance(
                 resistance=resistance_ohms,
                 resistance_to_temperature=resistance_to_temperature,
+                sorted_resistances=sorted_resistances,
             )
         except Exception as _exn:  # pylint: disable=broad-except
             return None
 
+    # The ADC can only ever produce this many distinct values, so every possible reading is
+    # converted once up front and each read becomes an index into this table.
+    temperature_by_adc_counts: Tuple[Optional[float], ...] = tuple(
+        convert(adc_counts) for adc_counts in range(max_adc_count)
+    )
+
+    def adc_counts_to_temperature(adc_counts: int) -> Optional[float]:
+        """
+        Output function, looks up the pre-converted temperature for in-range readings.
+        :param adc_counts: ADC counts.
+        :return: Temperature in degrees Celsius. If something goes wrong, a `None` is returned.
+        """
+        if 0 <= adc_counts < max_adc_count:
+            return temperature_by_adc_counts[adc_counts]
+        return convert(adc_counts)
+
     return adc_counts_to_temperature
@@ -1,25 +1,33 @@
 """Main module."""
 
-import json
 import logging
 import os
+import pwd
 import sys
 from enum import Enum
-from functools import partial
-from itertools import count
+from functools import lru_cache, partial
+from itertools import cycle
 from pathlib import Path
-from typing import Any, Callable, List, Optional, Type, get_args, get_origin
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterator,
+    List,
+    NamedTuple,
+    Sequence,
+    Tuple,
+    Type,
+    get_args,
+    get_origin,
+)
 
 import click
-from apscheduler.schedulers.background import BackgroundScheduler
 from bonus_click import options
 from click.decorators import FC
-from jinja2 import Template
 from pydantic import BaseModel, ValidationError
 
 from open_rack_vent import assets, canonical_stop_event
 from open_rack_vent.canonical_stop_event import SignalEvent
-from open_rack_vent.control_api import mqtt_api, web_api
 from open_rack_vent.control_api.control_api_common import APIController
 from open_rack_vent.host_hardware import (
     HardwarePlatform,
@@ -28,7 +36,9 @@ from open_rack_vent.host_hardware import (
     WireMapping,
     create_hardware_interface,
 )
-from open_rack_vent.host_hardware.board_interface_types import OpenRackVentHardwareInterface
+
+if TYPE_CHECKING:
+    from jinja2 import Template
 
 LOGGER_FORMAT = "[%(asctime)s - %(process)s - %(name)20s - %(levelname)s] %(message)s"
 LOGGER_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
@@ -45,9 +55,11 @@ LOGGER = logging.getLogger(__name__)
 logging.getLogger("apscheduler").setLevel(logging.ERROR)
 
 
+@lru_cache(maxsize=None)
 def type_to_str(annotation: type) -> str:
     """
     Convert a type annotation into a readable representation for help text.
+    The output only depends on the (hashable) annotation, so results are memoized.
 
     Supports:
     - Enums -> "Enum[A, B, C]"
@@ -66,10 +78,10 @@ def type_to_str(annotation: type) -> str:
         and issubclass(annotation, tuple)
         and hasattr(annotation, "_fields")
     ):
-        field_parts = []
-        for field_name, field_type in annotation.__annotations__.items():
-            field_parts.append(f"{field_name}: {type_to_str(field_type)}")
-        field_str = ", ".join(field_parts)
+        field_str = ", ".join(
+            f"{field_name}: {type_to_str(field_type)}"
+            for field_name, field_type in annotation.__annotations__.items()
+        )
         return f"{annotation.__name__.title()}({field_str})"
 
     # Handle Enums
@@ -92,17 +104,22 @@ def type_to_str(annotation: type) -> str:
     return origin_name
 
 
+@lru_cache(maxsize=None)
 def click_help_for_pydantic_model(help_prefix: str, model: Type[BaseModel]) -> str:
     """
-    Generate a help string for a Pydantic v2 model, one key per line.
+    Generate a help string for a Pydantic v2 model, one key per line. Memoized, models are static.
     :param help_prefix: Prepended to the help content about the keys.
     :param model: The Pydantic model to generate help for.
     :return: Help text, pre-escaped with \b's for click.
     """
-    lines = [
-        f"{name}: {type_to_str(field.annotation)}" for name, field in model.model_fields.items()
-    ]
-    return "".join(["\b\n", help_prefix, "".join(["\b\n   • " + line for line in lines])])
+    return (
+        "\b\n"
+        + help_prefix
+        + "".join(
+            f"\b\n   • {name}: {type_to_str(field.annotation)}"
+            for name, field in model.model_fields.items()
+        )
+    )
 
 
 def validate_pydantic_json(
@@ -119,24 +136,67 @@ def validate_pydantic_json(
     :raises click.BadParameter: If JSON parsing or Pydantic validation fails.
     """
     try:
-        data: dict[str, Any] = json.loads(value)  # type: ignore[misc]
-        return model(**data)
-    except json.JSONDecodeError as e:
-        raise click.BadParameter(f"Invalid JSON: {e.msg}")
+        return model.model_validate_json(value)
     except ValidationError as e:
+        # Parsing and validation happen in one pass, malformed JSON surfaces as a `json_invalid`
+        # error (message already reads "Invalid JSON: ...") rather than a `json.JSONDecodeError`.
+        for error in e.errors():
+            if error["type"] == "json_invalid":
+                raise click.BadParameter(error["msg"])
         raise click.BadParameter(f"Pydantic validation failed: {e}")
 
 
-def toggling_job(bool_callable: Callable[[bool], None], state_count: "count[int]") -> None:
+DEFAULT_WIRE_MAPPING_JSON = (
+    '{"version":"1","fans":{"intake_lower":["PN2","PN5"],'
+    '"intake_upper":["ONBOARD","PN3"]},'
+    '"thermistors":{"intake_lower":["TMP0","TMP1"],"intake_upper":["TMP4","TMP5"]}}'
+)
+"""
+Used as the `--wire-mapping-json` default.
+"""
+
+
+@lru_cache(maxsize=None)
+def _default_wire_mapping() -> WireMapping:
+    """
+    Validate `DEFAULT_WIRE_MAPPING_JSON`, only the first time it's needed.
+    :return: The default wire mapping.
+    """
+
+    return WireMapping.model_validate_json(DEFAULT_WIRE_MAPPING_JSON)
+
+
+def validate_wire_mapping_json(ctx: click.Context, param: click.Parameter, value: str) -> BaseModel:
+    """
+    Click callback for `--wire-mapping-json`. The (common) default value skips re-validation.
+    :param ctx: Click context (provided automatically by Click).
+    :param param: Click parameter object (provided automatically by Click).
+    :param value: The raw JSON string to validate.
+    :return: The validated `WireMapping`.
+    :raises click.BadParameter: See `validate_pydantic_json`.
+    """
+
+    if value == DEFAULT_WIRE_MAPPING_JSON:
+        return _default_wire_mapping()
+
+    return validate_pydantic_json(WireMapping, ctx, param, value)
+
+
+def toggling_job(
+    bool_callables: Sequence[Callable[[bool], object]], states: Iterator[bool]
+) -> None:
     """
-    Apscheduler job function that takes a bool callable and a thread safe counter and repeatedly
-    calls `bool_callable` with true/false (using the state_count).
-    :param bool_callable: To call
-    :param state_count: Used to get the toggling behavior.
+    Apscheduler job function that takes bool callables and an iterator of states and repeatedly
+    calls each of the `bool_callables` with the next state. Pass `cycle((True, False))` to toggle.
+    :param bool_callables: To call, all with the same state.
+    :param states: Used to get the toggling behavior.
     :return: None
     """
 
-    bool_callable(bool(next(state_count) % 2 == 0))
+    state = next(states)
+
+    for bool_callable in bool_callables:
+        bool_callable(state)
 
 
 @click.group()
@@ -150,25 +210,155 @@ def cli() -> None:
     """
 
 
-_ENV_VAR_MAPPING = {
-    "platform": "ORV_PLATFORM",
-    "pcb_revision": "ORV_PCB_REVISION",
-    "wire_mapping_json": "ORV_WIRE_MAPPING_JSON",
-    "web_api": "ORV_WEB_API_ENABLED",
-    "mqtt_api": "ORV_MQTT_API_ENABLED",
-    "web_api_host": "ORV_WEB_API_HOST",
-    "web_api_port": "ORV_WEB_API_PORT",
-    "mqtt_broker_host": "ORV_MQTT_BROKER_HOST",
-    "mqtt_broker_port": "ORV_MQTT_BROKER_PORT",
-    "mqtt_device_id": "ORV_MQTT_DEVICE_ID",
-    "mqtt_username": "ORV_MQTT_USERNAME",
-    "mqtt_password": "ORV_MQTT_PASSWORD",
-}
+class _EnvVars(NamedTuple):
+    """
+    Names of the environment variables that can set each of the run options.
+    """
+
+    platform: str = "ORV_PLATFORM"
+    pcb_revision: str = "ORV_PCB_REVISION"
+    wire_mapping_json: str = "ORV_WIRE_MAPPING_JSON"
+    web_api: str = "ORV_WEB_API_ENABLED"
+    mqtt_api: str = "ORV_MQTT_API_ENABLED"
+    web_api_host: str = "ORV_WEB_API_HOST"
+    web_api_port: str = "ORV_WEB_API_PORT"
+    mqtt_broker_host: str = "ORV_MQTT_BROKER_HOST"
+    mqtt_broker_port: str = "ORV_MQTT_BROKER_PORT"
+    mqtt_device_id: str = "ORV_MQTT_DEVICE_ID"
+    mqtt_username: str = "ORV_MQTT_USERNAME"
+    mqtt_password: str = "ORV_MQTT_PASSWORD"
+
+
+_ENV_VARS = _EnvVars()
 """
 Used to make sure the environment variables match in the systemd unit and CLI arguments.
 """
 
 
+_CommandDecorator = Callable[[Callable[..., object]], Callable[..., object]]  # type: ignore[explicit-any]
+"""
+A click decorator, like an option, that can be applied to any command.
+"""
+
+_RUN_OPTION_DECORATORS: Tuple[_CommandDecorator, ...] = (
+    options.create_enum_option(
+        arg_flag="--platform",
+        help_message="The type of hardware running this application.",
+        default=HardwarePlatform.beaglebone_black,
+        input_enum=HardwarePlatform,
+        envvar=_ENV_VARS.platform,
+    ),
+    options.create_enum_option(
+        arg_flag="--pcb-revision",
+        help_message="The revision of the board driving the fans etc.",
+        default=PCBRevision.v100,
+        input_enum=PCBRevision,
+        envvar=_ENV_VARS.pcb_revision,
+    ),
+    click.option(
+        "--wire-mapping-json",
+        "wire_mapping",
+        required=True,
+        callback=validate_wire_mapping_json,
+        help=click_help_for_pydantic_model(
+            help_prefix="JSON payload string with keys:", model=WireMapping
+        ),
+        default=DEFAULT_WIRE_MAPPING_JSON,
+        envvar=_ENV_VARS.wire_mapping_json,
+        show_envvar=True,
+    ),
+    click.option(
+        "--web-api",
+        "enable_web_api",
+        required=True,
+        help="Providing this enables the web control api.",
+        is_flag=True,
+        default=True,
+        show_default=True,
+        envvar=_ENV_VARS.web_api,
+        show_envvar=True,
+    ),
+    click.option(
+        "--mqtt-api",
+        "enable_mqtt_api",
+        required=True,
+        help="Providing this enables the MQTT api.",
+        is_flag=True,
+        default=True,
+        show_default=True,
+        envvar=_ENV_VARS.mqtt_api,
+        show_envvar=True,
+    ),
+    click.option(
+        "--web-api-host",
+        default="0.0.0.0",
+        show_default=True,
+        help="Host address the web API binds to.",
+        envvar=_ENV_VARS.web_api_host,
+        show_envvar=True,
+        type=click.STRING,
+    ),
+    click.option(
+        "--web-api-port",
+        default=8000,
+        show_default=True,
+        help="Port the web API listens on.",
+        envvar=_ENV_VARS.web_api_port,
+        show_envvar=True,
+        type=click.INT,
+    ),
+    click.option(
+        "--mqtt-broker-host",
+        default="homeassistant.local",
+        show_default=True,
+        help="Hostname or IP of the MQTT broker.",
+        envvar=_ENV_VARS.mqtt_broker_host,
+        show_envvar=True,
+        type=click.STRING,
+    ),
+    click.option(
+        "--mqtt-broker-port",
+        default=1883,
+        show_default=True,
+        help="Port of the MQTT broker.",
+        envvar=_ENV_VARS.mqtt_broker_port,
+        show_envvar=True,
+        type=click.INT,
+    ),
+    click.option(
+        "--mqtt-device-id",
+        default="orv-1",
+        show_default=True,
+        help="Device ID used for MQTT discovery/state topics.",
+        envvar=_ENV_VARS.mqtt_device_id,
+        show_envvar=True,
+        type=click.STRING,
+    ),
+    click.option(
+        "--mqtt-username",
+        default="orv_user",
+        show_default=True,
+        help="MQTT Broker username.",
+        envvar=_ENV_VARS.mqtt_username,
+        show_envvar=True,
+        type=click.STRING,
+    ),
+    click.option(
+        "--mqtt-password",
+        default="password",
+        show_default=True,
+        help="MQTT Broker password.",
+        envvar=_ENV_VARS.mqtt_password,
+        show_envvar=True,
+        type=click.STRING,
+    ),
+)
+"""
+The click options that define a run. Built once at import, click option decorators create a fresh
+`Option` each time they're applied, so these can be shared between commands.
+"""
+
+
 def run_options() -> Callable[[FC], FC]:
     """
     Creates the group of click options that define a run.
@@ -182,125 +372,7 @@ def run_options() -> Callable[[FC], FC]:
         :return: Wrapped input.
         """
 
-        decorators = [
-            options.create_enum_option(
-                arg_flag="--platform",
-                help_message="The type of hardware running this application.",
-                default=HardwarePlatform.beaglebone_black,
-                input_enum=HardwarePlatform,
-                envvar=_ENV_VAR_MAPPING["platform"],
-            ),
-            options.create_enum_option(
-                arg_flag="--pcb-revision",
-                help_message="The revision of the board driving the fans etc.",
-                default=PCBRevision.v100,
-                input_enum=PCBRevision,
-                envvar=_ENV_VAR_MAPPING["pcb_revision"],
-            ),
-            click.option(
-                "--wire-mapping-json",
-                "wire_mapping",
-                required=True,
-                callback=partial(validate_pydantic_json, WireMapping),
-                help=click_help_for_pydantic_model(
-                    help_prefix="JSON payload string with keys:", model=WireMapping
-                ),
-                default=(
-                    '{"version":"1","fans":{"intake_lower":["PN2","PN5"],'
-                    '"intake_upper":["ONBOARD","PN3"]},'
-                    '"thermistors":{"intake_lower":["TMP0","TMP1"],"intake_upper":["TMP4","TMP5"]}}'
-                ),
-                envvar=_ENV_VAR_MAPPING["wire_mapping_json"],
-                show_envvar=True,
-            ),
-            click.option(
-                "--web-api",
-                "enable_web_api",
-                required=True,
-                help="Providing this enables the web control api.",
-                is_flag=True,
-                default=True,
-                show_default=True,
-                envvar=_ENV_VAR_MAPPING["web_api"],
-                show_envvar=True,
-            ),
-            click.option(
-                "--mqtt-api",
-                "enable_mqtt_api",
-                required=True,
-                help="Providing this enables the MQTT api.",
-                is_flag=True,
-                default=True,
-                show_default=True,
-                envvar=_ENV_VAR_MAPPING["mqtt_api"],
-                show_envvar=True,
-            ),
-            click.option(
-                "--web-api-host",
-                default="0.0.0.0",
-                show_default=True,
-                help="Host address the web API binds to.",
-                envvar=_ENV_VAR_MAPPING["web_api_host"],
-                show_envvar=True,
-                type=click.STRING,
-            ),
-            click.option(
-                "--web-api-port",
-                default=8000,
-                show_default=True,
-                help="Port the web API listens on.",
-                envvar=_ENV_VAR_MAPPING["web_api_port"],
-                show_envvar=True,
-                type=click.INT,
-            ),
-            click.option(
-                "--mqtt-broker-host",
-                default="homeassistant.local",
-                show_default=True,
-                help="Hostname or IP of the MQTT broker.",
-                envvar=_ENV_VAR_MAPPING["mqtt_broker_host"],
-                show_envvar=True,
-                type=click.STRING,
-            ),
-            click.option(
-                "--mqtt-broker-port",
-                default=1883,
-                show_default=True,
-                help="Port of the MQTT broker.",
-                envvar=_ENV_VAR_MAPPING["mqtt_broker_port"],
-                show_envvar=True,
-                type=click.INT,
-            ),
-            click.option(
-                "--mqtt-device-id",
-                default="orv-1",
-                show_default=True,
-                help="Device ID used for MQTT discovery/state topics.",
-                envvar=_ENV_VAR_MAPPING["mqtt_device_id"],
-                show_envvar=True,
-                type=click.STRING,
-            ),
-            click.option(
-                "--mqtt-username",
-                default="orv_user",
-                show_default=True,
-                help="MQTT Broker username.",
-                envvar=_ENV_VAR_MAPPING["mqtt_username"],
-                show_envvar=True,
-                type=click.STRING,
-            ),
-            click.option(
-                "--mqtt-password",
-                default="password",
-                show_default=True,
-                help="MQTT Broker password.",
-                envvar=_ENV_VAR_MAPPING["mqtt_password"],
-                show_envvar=True,
-                type=click.STRING,
-            ),
-        ]
-
-        for dec in reversed(decorators):
+        for dec in reversed(_RUN_OPTION_DECORATORS):
             dec(command)
 
         return command
@@ -347,40 +419,61 @@ def run(  # pylint: disable=too-many-arguments, too-many-positional-arguments, t
     :return: None
     """
 
-    stop_event: SignalEvent = canonical_stop_event.create_signal_event()
-    canonical_stop_event.entry_point_exit_condition(signal_event=stop_event)
+    # The API and scheduler libraries are slow to import, so they're only pulled in for a run,
+    # not for `--help` or `render-systemd`.
+    # pylint: disable=import-outside-toplevel
+    from apscheduler.executors.pool import ThreadPoolExecutor
+    from apscheduler.schedulers.background import BackgroundScheduler
 
-    controller_apis: List[APIController] = []
+    from open_rack_vent.control_api import mqtt_api, web_api
 
-    hardware_interface: Optional[OpenRackVentHardwareInterface] = None
+    stop_event: SignalEvent = canonical_stop_event.create_signal_event()
+    canonical_stop_event.entry_point_exit_condition(signal_event=stop_event)
 
     try:
-
+        # Only picks the implementation, nothing on the board is touched yet.
         hardware_interface = create_hardware_interface(
             pcb_revision=pcb_revision,
             platform=platform,
             wire_mapping=wire_mapping,
         )
+    except ValueError as e:
+        raise click.ClickException(f"Couldn't set up the hardware interface: {e}") from e
 
+    try:
         hardware_interface.set_onboard_led(OnboardLED.fault, False)
+    except OSError as e:
+        # The board's sysfs isn't there or a pin couldn't be muxed. Without working IO there's
+        # nothing to run (or to signal the fault with), so exit non-zero for systemd to see.
+        hardware_interface.close()
+        raise click.ClickException(f"Couldn't set up the hardware interface: {e}") from e
+    except BaseException:
+        hardware_interface.close()
+        raise
+
+    controller_apis: List[APIController] = []
+
+    # There's only the one LED job, the default executor's pool of 10 threads is overkill. Late
+    # ticks are collapsed into one rather than replayed back-to-back.
+    scheduler = BackgroundScheduler(
+        executors={"default": ThreadPoolExecutor(max_workers=1)},
+        job_defaults={"coalesce": True, "max_instances": 1, "misfire_grace_time": 1},
+    )
+
+    try:
+        # All the status LEDs blink together off of the one scheduler job.
+        status_led_setters = [partial(hardware_interface.set_onboard_led, OnboardLED.run)]
 
-        scheduler = BackgroundScheduler()
+        if enable_web_api or enable_mqtt_api:
+            status_led_setters.append(partial(hardware_interface.set_onboard_led, OnboardLED.web))
 
         scheduler.add_job(
             toggling_job,
             "interval",
             seconds=0.5,
-            args=(lambda v: hardware_interface.set_onboard_led(OnboardLED.run, v), count(0)),
+            args=(status_led_setters, cycle((True, False))),
         )
 
-        if any([web_api, mqtt_api]):
-            scheduler.add_job(
-                toggling_job,
-                "interval",
-                seconds=0.5,
-                args=(lambda v: hardware_interface.set_onboard_led(OnboardLED.web, v), count(0)),
-            )
-
         if enable_web_api:
             controller_apis.append(
                 web_api.create_web_api(
@@ -415,17 +508,74 @@ def run(  # pylint: disable=too-many-arguments, too-many-positional-arguments, t
         stop_event.wait()
 
     except Exception:  # pylint: disable=broad-except
-        if hardware_interface is not None:
-            hardware_interface.set_onboard_led(OnboardLED.fault, True)
+        hardware_interface.set_onboard_led(OnboardLED.fault, True)
         LOGGER.exception("Uncaught Runtime Error")
     finally:
         for controller_api in controller_apis:
             controller_api.stop()
 
-        # Don't need to now but could add hardware cleanup here.
+        # The LED job has to be done with the hardware before its files are closed underneath it.
+        if scheduler.running:
+            scheduler.shutdown(wait=True)
+
+        hardware_interface.close()
+
         LOGGER.info("Stopping ORV. Bye!")
 
 
+_SYSTEMD_ESCAPE_TABLE = str.maketrans({"\\": "\\\\", '"': '\\"', "$": "$$"})
+"""
+Translation table for `_systemd_escape`.
+"""
+
+
+def _systemd_escape(value: str) -> str:
+    """
+    Escape a value for systemd Environment= line.
+
+    - Backslashes are escaped
+    - Double quotes are escaped
+    - Dollar signs are doubled
+
+    Done in one pass with `str.translate`, so escaped characters are never re-escaped.
+
+    :param value: To escape.
+    :return: The escaped value.
+    """
+    return value.translate(_SYSTEMD_ESCAPE_TABLE)
+
+
+def _wire_mapping_json(wire_mapping: WireMapping) -> str:
+    """
+    Serialize a wire mapping for the systemd unit. The default mapping already has its JSON form,
+    `DEFAULT_WIRE_MAPPING_JSON` is exactly what `model_dump_json` would produce for it.
+    :param wire_mapping: To serialize.
+    :return: JSON string.
+    """
+
+    if wire_mapping is _default_wire_mapping():
+        return DEFAULT_WIRE_MAPPING_JSON
+
+    return wire_mapping.model_dump_json()
+
+
+@lru_cache(maxsize=1)
+def _systemd_template() -> "Template":
+    """
+    Read and compile the systemd unit template, only the first time it's needed. Jinja is only
+    imported here, a run never needs it.
+    :return: The template.
+    """
+
+    from jinja2 import Template  # pylint: disable=import-outside-toplevel
+
+    template: "Template" = Template(
+        assets.SYSTEMD_SERVICE_TEMPLATE_PATH.read_text(encoding="utf-8")
+    )
+
+    return template
+
+
 def render_systemd_file(  # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-locals
     platform: HardwarePlatform,
     pcb_revision: PCBRevision,
@@ -457,41 +607,27 @@ def render_systemd_file(  # pylint: disable=too-many-arguments, too-many-positio
     :return: The contents of the systemd file. Go write it to disk!
     """
 
-    def systemd_escape(value: str) -> str:
-        """
-        Escape a value for systemd Environment= line.
-
-        - Backslashes are escaped first
-        - Double quotes are escaped
-        - Dollar signs are doubled
-        """
-        value = str(value)  # in case it’s not a string
-        value = value.replace("\\", "\\\\")
-        value = value.replace('"', '\\"')
-        value = value.replace("$", "$$")
-        return value
-
-    template = Template(assets.SYSTEMD_SERVICE_TEMPLATE_PATH.read_text(encoding="utf-8"))
-
-    rendered = template.render(
-        user=os.getlogin(),
+    rendered = _systemd_template().render(
+        # Units usually get written to /etc with sudo, the unit should still run as whoever ran
+        # sudo rather than root.
+        user=os.environ.get("SUDO_USER") or pwd.getpwuid(os.getuid()).pw_name,
         exec_start=" ".join([sys.executable, os.path.abspath(__file__), RUN_COMMAND_NAME]),
         env_vars={
-            k: systemd_escape(str(v))
-            for k, v in {
-                _ENV_VAR_MAPPING["platform"]: platform.value,
-                _ENV_VAR_MAPPING["pcb_revision"]: pcb_revision.value,
-                _ENV_VAR_MAPPING["wire_mapping_json"]: wire_mapping.model_dump_json(),
-                _ENV_VAR_MAPPING["web_api"]: str(enable_web_api).upper(),
-                _ENV_VAR_MAPPING["mqtt_api"]: str(enable_mqtt_api).upper(),
-                _ENV_VAR_MAPPING["web_api_host"]: web_api_host,
-                _ENV_VAR_MAPPING["web_api_port"]: str(web_api_port),
-                _ENV_VAR_MAPPING["mqtt_broker_host"]: mqtt_broker_host,
-                _ENV_VAR_MAPPING["mqtt_broker_port"]: mqtt_broker_port,
-                _ENV_VAR_MAPPING["mqtt_device_id"]: mqtt_device_id,
-                _ENV_VAR_MAPPING["mqtt_username"]: mqtt_username,
-                _ENV_VAR_MAPPING["mqtt_password"]: mqtt_password,
-            }.items()
+            env_var: _systemd_escape(str(value))
+            for env_var, value in (
+                (_ENV_VARS.platform, platform.value),
+                (_ENV_VARS.pcb_revision, pcb_revision.value),
+                (_ENV_VARS.wire_mapping_json, _wire_mapping_json(wire_mapping)),
+                (_ENV_VARS.web_api, str(enable_web_api).upper()),
+                (_ENV_VARS.mqtt_api, str(enable_mqtt_api).upper()),
+                (_ENV_VARS.web_api_host, web_api_host),
+                (_ENV_VARS.web_api_port, web_api_port),
+                (_ENV_VARS.mqtt_broker_host, mqtt_broker_host),
+                (_ENV_VARS.mqtt_broker_port, mqtt_broker_port),
+                (_ENV_VARS.mqtt_device_id, mqtt_device_id),
+                (_ENV_VARS.mqtt_username, mqtt_username),
+                (_ENV_VARS.mqtt_password, mqtt_password),
+            )
         },
     )
 